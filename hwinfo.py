@@ -7,13 +7,83 @@ This script fetches CPU temperature and memory usage, outputting JSON compatible
 
 import argparse
 import json
+import os
+import re
 import time
 import sys
-import logging
+from typing import NamedTuple, Optional, Union
 
-# Set up basic logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+# Optional, only imported by import_psutil() when --use-psutil is given
+psutil = None
+
+class LazyLogger:
+    """
+    Stand-in for the module logger that imports and configures logging on first use.
+    
+    Nothing is logged on the happy path, so this keeps the logging import and
+    basicConfig() off it entirely.
+    """
+    def __getattr__(self, name):
+        global logger
+        import logging
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        logger = logging.getLogger(__name__)
+        return getattr(logger, name)
+
+logger = LazyLogger()
+
+# MemTotal and MemAvailable are the first and third lines of /proc/meminfo
+MEMINFO_RE = re.compile(rb'MemTotal:\s+(\d+).*?MemAvailable:\s+(\d+)', re.S)
+
+# The only sysfs files the thermal scan may open; reading arbitrary sysfs nodes
+# can hang or even reset some machines
+ZONE_TEMP_RE = re.compile(r'/sys/class/thermal/thermal_zone\d+/temp')
+
+# Thermal zone types preferred over the generic ACPI zone
+PREFERRED_ZONE_TYPES = frozenset((b'coretemp', b'k10temp', b'x86_pkg_temp'))
+
+# Escapes for embedding text in a JSON string (quote, backslash, control characters)
+JSON_ESCAPES = {i: f'\\u{i:04x}' for i in range(0x20)}
+JSON_ESCAPES.update({ord('"'): '\\"', ord('\\'): '\\\\', ord('\n'): '\\n', ord('\t'): '\\t'})
+
+# Per-user state that may persist across reboots
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'thermo-waybar'
+)
+
+# Per-session state; XDG_RUNTIME_DIR is private to the user and cleared on logout.
+# Without it, fall back to the user's cache directory rather than a shared /tmp.
+RUNTIME_DIR = os.environ.get('XDG_RUNTIME_DIR') or CACHE_DIR
+
+# Output of the last successful run, replayed when restarted within half an interval
+OUTPUT_CACHE_PATH = os.path.join(RUNTIME_DIR, 'thermo-waybar.json')
+
+# Thermal zone temp paths and their priority, so the type files are only read once
+ZONES_CACHE_PATH = os.path.join(RUNTIME_DIR, 'thermo-waybar-zones.json')
+
+# Last /proc/stat counters, persisted between runs to compute CPU load deltas
+CPU_SNAPSHOT_PATH = os.path.join(CACHE_DIR, 'cpu.json')
+
+# Sampling window for the CPU load when there is no snapshot to diff against
+FIRST_SAMPLE_SECONDS = 0.2
+
+class MemInfo(NamedTuple):
+    """Memory usage; all fields are None when it could not be read."""
+    used_gb: Optional[float]
+    total_gb: Optional[float]
+    percent: Optional[float]
+
+class CpuLoad(NamedTuple):
+    """CPU usage in percent; overall is None when it could not be read."""
+    overall: Optional[float]
+    per_core: list[float]
+
+class Snapshot(NamedTuple):
+    """All readings of one run."""
+    cpu_temp: Union[float, str]
+    mem_info: MemInfo
+    cpu_load: CpuLoad
 
 def parse_arguments():
     """Parse command-line arguments."""
@@ -21,26 +91,74 @@ def parse_arguments():
     parser.add_argument(
         "--interval",
         type=int,
-        default=30,
-        help="Update interval in seconds (default: 30)"
+        default=None,
+        help="Waybar update interval in seconds; when given, runs restarted within "
+             "half of it replay the previous output (default: always read sensors)"
+    )
+    parser.add_argument(
+        "--use-psutil",
+        action="store_true",
+        help="Read temperature and memory through psutil instead of sysfs/procfs"
     )
     return parser.parse_args()
 
-def get_cpu_temperature():
+def import_psutil():
     """
-    Get CPU temperature using psutil (preferred) or fallback to /sys/class/thermal.
+    Import psutil on demand (it costs tens of milliseconds at startup).
     
     Returns:
-        float or str: Average CPU temperature in Celsius, or "N/A" if not available.
+        bool: True if psutil is available.
     """
+    global psutil
     try:
-        # Try using psutil first
         import psutil
-        temps = psutil.sensors_temperatures()
+    except ImportError:
+        logger.warning("psutil not installed. Falling back to sysfs/procfs.")
+        return False
+    return True
+
+def read_file(path, size=4096):
+    """
+    Read a small procfs/sysfs file with a single os.read() call.
+    
+    Bypasses open() and Python's buffered I/O layer, which only adds overhead for
+    files that are read once in full.
+    
+    Args:
+        path (str): File to read.
+        size (int): Maximum number of bytes to read.
         
-        if not temps:
-            logger.warning("psutil.sensors_temperatures() returned no data.")
-        else:
+    Returns:
+        bytes: File contents, truncated to size bytes.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, size)
+    finally:
+        os.close(fd)
+
+def get_cpu_temperature(boot_id, use_psutil=False):
+    """
+    Get CPU temperature from /sys/class/thermal, or from psutil when requested.
+    
+    Args:
+        boot_id (str or None): Current boot ID, see read_boot_id().
+        use_psutil (bool): Try psutil first and use /sys/class/thermal as fallback
+            (unless psutil found no sensors at all).
+    
+    Returns:
+        float or str: Average CPU temperature in Celsius, or "N/A" if not available.
+    """
+    if use_psutil:
+        try:
+            temps = psutil.sensors_temperatures()
+
+            if not temps:
+                # psutil reads /sys/class/thermal itself when hwmon is empty, so the
+                # sysfs scan below would not find anything either
+                logger.warning("psutil.sensors_temperatures() returned no data.")
+                return "N/A"
+
             # Look for common CPU sensor names (prioritize coretemp/k10temp over acpi)
             cpu_keys = ['coretemp', 'k10temp', 'x86_pkg_temp', 'acpitz']
             for key in cpu_keys:
@@ -53,11 +171,11 @@ def get_cpu_temperature():
                         if entry.current is not None and 0 < entry.current < 150:
                             total_temp += entry.current
                             count += 1
-                    
+
                     if count > 0:
                         avg_temp = total_temp / count
-                        return round(avg_temp, 1)
-            
+                        return avg_temp
+
             # If no known keys found, try to find any sensor with 'cpu' in its name
             for name, entries in temps.items():
                 if 'cpu' in name.lower() or 'core' in name.lower():
@@ -67,237 +185,551 @@ def get_cpu_temperature():
                         if entry.current is not None and 0 < entry.current < 150:
                             total_temp += entry.current
                             count += 1
-                    
+
                     if count > 0:
                         avg_temp = total_temp / count
-                        return round(avg_temp, 1)
-                        
-    except ImportError:
-        logger.warning("psutil not installed. Falling back to /sys/class/thermal.")
-    except Exception as e:
-        logger.error(f"Error getting CPU temperature with psutil: {e}")
+                        return avg_temp
+        except Exception as e:
+            logger.error(f"Error getting CPU temperature with psutil: {e}")
 
-    # Fallback to /sys/class/thermal
+    # Read /sys/class/thermal directly
     try:
-        import glob
-        import os
+        zones = load_thermal_zones(boot_id)
+        if zones:
+            try:
+                return average_zone_temperature(zones)
+            except FileNotFoundError:
+                logger.info("Cached thermal zones changed, rescanning /sys/class/thermal/")
         
-        thermal_paths = glob.glob('/sys/class/thermal/thermal_zone*/temp')
-        if not thermal_paths:
-            logger.warning("No thermal zones found in /sys/class/thermal/")
+        zones = scan_thermal_zones()
+        if not zones:
+            logger.warning("No CPU thermal zones found in /sys/class/thermal/")
             return "N/A"
         
-        # Separate temps by sensor type, prioritizing better CPU sensors
-        preferred_temps = []  # coretemp, k10temp, x86_pkg_temp
-        fallback_temps = []   # acpitz
+        # Only cache a complete set: a CPU sensor driver that loads later (leaving
+        # just acpitz on the first scan) must still be picked up
+        if 'preferred' in zones.values():
+            save_thermal_zones(zones, boot_id)
+        return average_zone_temperature(zones)
+            
+    except FileNotFoundError:
+        logger.warning("No thermal zones found in /sys/class/thermal/")
+    except Exception as e:
+        logger.error(f"Error getting CPU temperature from /sys/class/thermal: {e}")
         
-        for path in thermal_paths:
+    return "N/A"
+
+def scan_thermal_zones():
+    """
+    Classify the thermal zones in /sys/class/thermal by their sensor type.
+    
+    Returns:
+        dict: Mapping of zone temp file path to 'preferred' (coretemp, k10temp,
+              x86_pkg_temp) or 'fallback' (acpitz). Other zones are left out.
+    """
+    zones = {}
+    with os.scandir('/sys/class/thermal') as entries:
+        for entry in entries:
+            temp_path = f"{entry.path}/temp"
+            if not ZONE_TEMP_RE.fullmatch(temp_path):
+                continue
+            
             # Check if this is a CPU sensor by looking at the type file
-            type_path = os.path.join(os.path.dirname(path), 'type')
+            # (a single lowercase word, so it can be compared as a whole)
             try:
-                with open(type_path, 'r') as f:
-                    sensor_type = f.read().strip().lower()
-                
-                with open(path, 'r') as f:
-                    temp_milli = int(f.read().strip())
-                    temp_celsius = temp_milli / 1000.0
-                    
-                    # Skip invalid readings (< 0°C or > 150°C)
-                    if not (0 < temp_celsius < 150):
-                        continue
-                    
-                    # Prioritize coretemp/k10temp/x86_pkg_temp over acpitz
-                    if any(pref in sensor_type for pref in ['coretemp', 'k10temp', 'x86_pkg_temp']):
-                        preferred_temps.append(temp_celsius)
-                    elif 'acpi' in sensor_type:
-                        fallback_temps.append(temp_celsius)
-                        
-            except (IOError, ValueError) as e:
-                logger.warning(f"Could not read temperature from {path}: {e}")
+                sensor_type = read_file(f"{entry.path}/type").rstrip()
+            except IOError as e:
+                logger.warning(f"Could not read sensor type from {entry.path}: {e}")
                 continue
+            
+            # Prioritize coretemp/k10temp/x86_pkg_temp over acpitz
+            if sensor_type in PREFERRED_ZONE_TYPES:
+                zones[temp_path] = 'preferred'
+            elif sensor_type.startswith(b'acpi'):
+                zones[temp_path] = 'fallback'
+    return zones
+
+def load_thermal_zones(boot_id):
+    """
+    Load the thermal zone classification cached by a previous run.
+    
+    The sensor set does not change while the machine is up, so caching it saves
+    opening every zone's type file on each run. Zone numbers are not stable across
+    boots, so the cache is only used on the boot that wrote it.
+    
+    Args:
+        boot_id (str or None): Current boot ID, see read_boot_id().
+    
+    Returns:
+        dict: Zones in the format of scan_thermal_zones(), or an empty dict if
+              there is no usable cache.
+    """
+    try:
+        with open(ZONES_CACHE_PATH, 'r') as f:
+            cache = json.load(f)
+        if boot_id is None or cache['boot_id'] != boot_id:
+            return {}
+        zones = cache['zones']
+        if not isinstance(zones, dict):
+            raise ValueError("zones is not a JSON object")
         
-        # Use preferred sensors if available, otherwise fall back to acpitz
-        temps_to_use = preferred_temps if preferred_temps else fallback_temps
+        # The file is user-writable: only ever open thermal zone temp files from it,
+        # and rescan (overwriting the file) on anything unexpected
+        for path, priority in zones.items():
+            if not ZONE_TEMP_RE.fullmatch(path) or priority not in ('preferred', 'fallback'):
+                raise ValueError(f"unexpected entry {path!r}: {priority!r}")
+        return zones
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable thermal zone cache {ZONES_CACHE_PATH}: {e}")
+        return {}
+
+def save_thermal_zones(zones, boot_id):
+    """
+    Persist the thermal zone classification for load_thermal_zones().
+    
+    Args:
+        zones (dict): Zones in the format of scan_thermal_zones().
+        boot_id (str or None): Current boot ID, see read_boot_id().
+    """
+    try:
+        os.makedirs(RUNTIME_DIR, mode=0o700, exist_ok=True)
+        tmp_path = f"{ZONES_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'boot_id': boot_id, 'zones': zones}, f)
+        os.replace(tmp_path, ZONES_CACHE_PATH)
+    except OSError as e:
+        logger.warning(f"Could not save thermal zone cache to {ZONES_CACHE_PATH}: {e}")
+
+def average_zone_temperature(zones):
+    """
+    Average the temperatures of the preferred zones, or of the fallback zones if
+    no preferred zone has a valid reading.
+    
+    Args:
+        zones (dict): Zones in the format of scan_thermal_zones().
         
-        if temps_to_use:
-            avg_temp = sum(temps_to_use) / len(temps_to_use)
-            return round(avg_temp, 1)
-        else:
-            return "N/A"
-            
-    except Exception as e:
-        logger.error(f"Error getting CPU temperature from /sys/class/thermal: {e}")
+    Returns:
+        float or str: Average temperature in Celsius, or "N/A" if no zone has a valid reading.
         
-    return "N/A"
+    Raises:
+        FileNotFoundError: If a zone no longer exists (the zone set is stale).
+    """
+    # Sum temps by sensor type, prioritizing better CPU sensors
+    preferred_sum, preferred_count = 0.0, 0  # coretemp, k10temp, x86_pkg_temp
+    fallback_sum, fallback_count = 0.0, 0    # acpitz
+    
+    for path, priority in zones.items():
+        try:
+            temp_milli = int(read_file(path))  # int() tolerates the trailing newline
+        except FileNotFoundError:
+            raise
+        except (IOError, ValueError) as e:
+            logger.warning(f"Could not read temperature from {path}: {e}")
+            continue
+        temp_celsius = temp_milli / 1000.0
+        
+        # Skip invalid readings (< 0°C or > 150°C)
+        if not (0 < temp_celsius < 150):
+            continue
+        
+        if priority == 'preferred':
+            preferred_sum += temp_celsius
+            preferred_count += 1
+        else:
+            fallback_sum += temp_celsius
+            fallback_count += 1
+    
+    # Use preferred sensors if available, otherwise fall back to acpitz
+    if preferred_count:
+        return preferred_sum / preferred_count
+    elif fallback_count:
+        return fallback_sum / fallback_count
+    else:
+        return "N/A"
 
-def get_cpu_load():
+def read_proc_stat():
     """
-    Get CPU load per core and overall average.
+    Read the aggregate and per-core jiffy counters from /proc/stat.
     
     Returns:
-        dict: Dictionary with 'overall' (average CPU usage) and 'per_core' (list of per-core usage).
+        dict: Mapping of 'cpu', 'cpu0', 'cpu1', ... to
+              (user, nice, system, idle, iowait, irq, softirq, steal) tuples.
+    """
+    counters = {}
+    # 64 KiB comfortably holds the cpu lines of machines with hundreds of cores
+    for line in read_file('/proc/stat', 65536).splitlines():
+        # The cpu lines always come first; stop at the first other line
+        if not line.startswith(b'cpu'):
+            break
+        fields = line.split()
+        counters[fields[0].decode()] = tuple(int(value) for value in fields[1:9])
+    return counters
+
+def read_boot_id():
+    """
+    Get the kernel's random boot ID, which is unique to this machine and boot.
+    
+    Returns:
+        str or None: Boot ID, or None if it cannot be read.
     """
     try:
-        import psutil
-        # Get per-core CPU usage (interval of 1 second for accurate reading)
-        cpu_percent = psutil.cpu_percent(interval=1, percpu=True)
-        overall = psutil.cpu_percent(interval=0)  # Get overall without additional delay
+        return read_file('/proc/sys/kernel/random/boot_id').strip().decode()
+    except OSError as e:
+        logger.warning(f"Could not read boot ID: {e}")
+        return None
+
+def load_cpu_snapshot(boot_id):
+    """
+    Load the /proc/stat counters persisted by the previous run.
+    
+    Args:
+        boot_id (str or None): Current boot ID, see read_boot_id().
+    
+    Returns:
+        tuple: (time.monotonic() when it was taken, counters in the format of
+               read_proc_stat()), or (None, {}) if there is no usable snapshot
+               (first run, or it was taken on another boot or another machine
+               sharing the home directory).
+    """
+    try:
+        with open(CPU_SNAPSHOT_PATH, 'r') as f:
+            snapshot = json.load(f)
         
-        return {
-            'overall': round(overall, 1),
-            'per_core': [round(load, 1) for load in cpu_percent]
-        }
-    except ImportError:
-        logger.warning("psutil not installed. Cannot get CPU load per core.")
-        return {'overall': None, 'per_core': []}
-    except Exception as e:
-        logger.error(f"Error getting CPU load: {e}")
-        return {'overall': None, 'per_core': []}
+        # Jiffy counters (and the monotonic clock) only compare within one boot
+        if boot_id is None or snapshot['boot_id'] != boot_id:
+            return None, {}
+        
+        # Validate the shape so a corrupt file cannot break get_cpu_load() for good
+        taken_at = float(snapshot['time'])
+        if not isinstance(snapshot['counters'], dict):
+            raise ValueError("counters is not a JSON object")
+        counters = {}
+        for name, values in snapshot['counters'].items():
+            counters[name] = tuple(int(value) for value in values)
+            if len(counters[name]) != 8:
+                raise ValueError(f"expected 8 counters for {name}")
+        return taken_at, counters
+    except FileNotFoundError:
+        return None, {}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable CPU snapshot {CPU_SNAPSHOT_PATH}: {e}")
+        return None, {}
+
+def save_cpu_snapshot(counters, boot_id):
+    """
+    Persist /proc/stat counters for the next run.
+    
+    Args:
+        counters (dict): Counters in the format of read_proc_stat().
+        boot_id (str or None): Current boot ID, see read_boot_id().
+    """
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        tmp_path = f"{CPU_SNAPSHOT_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'boot_id': boot_id, 'time': time.monotonic(), 'counters': counters}, f)
+        os.replace(tmp_path, CPU_SNAPSHOT_PATH)
+    except OSError as e:
+        logger.warning(f"Could not save CPU snapshot to {CPU_SNAPSHOT_PATH}: {e}")
 
-def get_memory_usage():
+def busy_percent(previous, current):
     """
-    Get memory usage information.
+    Calculate the busy percentage between two /proc/stat counter tuples.
+    
+    Args:
+        previous (tuple): Earlier counters (all zeros for the since-boot average).
+        current (tuple): Current counters.
+        
+    Returns:
+        float: Percentage of time spent outside idle/iowait, clamped to 0-100.
+    """
+    total_delta = sum(current) - sum(previous)
+    if total_delta <= 0:
+        return 0.0
+    
+    # idle + iowait count as idle time, everything else as busy
+    idle_delta = (current[3] + current[4]) - (previous[3] + previous[4])
+    percent = (total_delta - idle_delta) / total_delta * 100
+    return min(max(percent, 0.0), 100.0)
+
+def get_cpu_load(boot_id):
+    """
+    Get CPU load per core and overall average.
+    
+    Load is computed from the /proc/stat counters delta since the previous run, so
+    no sampling sleep is needed. On the first run (no snapshot yet), or when the
+    snapshot is younger than FIRST_SAMPLE_SECONDS because another run just wrote it
+    (e.g. one bar per monitor), a short FIRST_SAMPLE_SECONDS sample is taken
+    instead. That is noisier than a full interval (at 100 Hz it is 20 jiffies per
+    core), but it only affects one reading and is far closer to the current load
+    than the since-boot average.
+    
+    Args:
+        boot_id (str or None): Current boot ID, see read_boot_id().
     
     Returns:
-        dict: A dictionary containing 'used_gb', 'total_gb', and 'percent' keys.
+        CpuLoad: Overall average CPU usage and list of per-core usage.
     """
     try:
-        # Try using psutil first (most reliable)
-        import psutil
-        mem = psutil.virtual_memory()
+        taken_at, previous = load_cpu_snapshot(boot_id)
+        # A snapshot only milliseconds old spans a jiffy or two, which is noise
+        if not previous or time.monotonic() - taken_at < FIRST_SAMPLE_SECONDS:
+            previous = read_proc_stat()
+            time.sleep(FIRST_SAMPLE_SECONDS)
         
-        used_gb = mem.used / (1024**3)  # Convert bytes to GB
-        total_gb = mem.total / (1024**3)
-        percent = mem.percent
+        current = read_proc_stat()
+        save_cpu_snapshot(current, boot_id)
         
-        return {
-            "used_gb": round(used_gb, 1),
-            "total_gb": round(total_gb, 1),
-            "percent": round(percent, 1)
-        }
-                    
-    except ImportError:
-        logger.warning("psutil not installed. Falling back to /proc/meminfo.")
+        zero = (0,) * 8
+        overall = busy_percent(previous.get('cpu', zero), current['cpu'])
+        per_core = [
+            busy_percent(previous.get(name, zero), counters)
+            for name, counters in current.items()
+            if name != 'cpu'
+        ]
+        
+        return CpuLoad(
+            overall=overall,
+            per_core=per_core
+        )
     except Exception as e:
-        logger.error(f"Error getting memory usage with psutil: {e}")
+        logger.error(f"Error getting CPU load: {e}")
+        return CpuLoad(overall=None, per_core=[])
+
+def get_memory_usage(use_psutil=False):
+    """
+    Get memory usage information from /proc/meminfo, or from psutil when requested.
     
-    # Fallback to /proc/meminfo
+    Args:
+        use_psutil (bool): Try psutil first and use /proc/meminfo as fallback.
+    
+    Returns:
+        MemInfo: Used and total memory in GB and the used percentage.
+    """
+    if use_psutil:
+        try:
+            mem = psutil.virtual_memory()
+
+            used_gb = mem.used / (1024**3)  # Convert bytes to GB
+            total_gb = mem.total / (1024**3)
+            percent = mem.percent
+
+            return MemInfo(
+                used_gb=used_gb,
+                total_gb=total_gb,
+                percent=percent
+            )
+        except Exception as e:
+            logger.error(f"Error getting memory usage with psutil: {e}")
+
+    # Read /proc/meminfo directly
     try:
-        with open('/proc/meminfo', 'r') as f:
-            meminfo = {}
-            for line in f:
-                parts = line.split(':')
-                if len(parts) == 2:
-                    key = parts[0].strip()
-                    value = parts[1].strip().split()[0]  # Get the number, ignore 'kB'
-                    meminfo[key] = int(value)
+        # Both fields are always within the first few lines, no need to read further
+        match = MEMINFO_RE.search(read_file('/proc/meminfo', 512))
         
         # Calculate memory usage
         # MemTotal - MemAvailable gives us the actual used memory
-        if 'MemTotal' in meminfo and 'MemAvailable' in meminfo:
-            total_kb = meminfo['MemTotal']
-            available_kb = meminfo['MemAvailable']
+        if match:
+            total_kb = int(match.group(1))
+            available_kb = int(match.group(2))
             used_kb = total_kb - available_kb
             
             used_gb = used_kb / (1024**2)  # Convert KB to GB
             total_gb = total_kb / (1024**2)
             percent = (used_kb / total_kb) * 100
             
-            return {
-                "used_gb": round(used_gb, 1),
-                "total_gb": round(total_gb, 1),
-                "percent": round(percent, 1)
-            }
+            return MemInfo(
+                used_gb=used_gb,
+                total_gb=total_gb,
+                percent=percent
+            )
         else:
             logger.warning("Could not find MemTotal or MemAvailable in /proc/meminfo")
-            return {"used_gb": "N/A", "total_gb": "N/A", "percent": "N/A"}
+            return MemInfo(used_gb=None, total_gb=None, percent=None)
             
     except Exception as e:
         logger.error(f"Error getting memory usage from /proc/meminfo: {e}")
-        return {"used_gb": "N/A", "total_gb": "N/A", "percent": "N/A"}
+        return MemInfo(used_gb=None, total_gb=None, percent=None)
+
+def to_waybar_json(text, tooltip, css_class):
+    """
+    Serialize a Waybar custom module payload.
+    
+    The payload always has the same four string fields, so it is formatted directly
+    instead of going through json.dumps.
+    
+    Args:
+        text (str): Text shown in the bar.
+        tooltip (str): Tooltip text.
+        css_class (str): Value used for both 'class' and 'alt'.
+        
+    Returns:
+        str: JSON formatted string for Waybar.
+    """
+    text = text.translate(JSON_ESCAPES)
+    tooltip = tooltip.translate(JSON_ESCAPES)
+    return (
+        f'{{"text": "{text}", "tooltip": "{tooltip}", '
+        f'"class": "{css_class}", "alt": "{css_class}"}}'
+    )
 
-def format_waybar_output(cpu_temp, mem_info, cpu_load):
+def collect_snapshot(use_psutil=False):
+    """
+    Collect all readings, reading the state they share only once.
+    
+    The boot ID validates both the thermal zone cache and the CPU snapshot, so it
+    is read here and passed to both getters.
+    
+    Args:
+        use_psutil (bool): Read temperature and memory through psutil first.
+        
+    Returns:
+        Snapshot: CPU temperature, memory usage and CPU load.
+    """
+    boot_id = read_boot_id()
+    return Snapshot(
+        cpu_temp=get_cpu_temperature(boot_id, use_psutil),
+        mem_info=get_memory_usage(use_psutil),
+        cpu_load=get_cpu_load(boot_id)
+    )
+
+def format_waybar_output(snapshot):
     """
     Format the output as a JSON string compatible with Waybar.
     
     Args:
-        cpu_temp (float or str): CPU temperature.
-        mem_info (dict): Dictionary with memory used, total, and percentage.
-        cpu_load (dict): Dictionary with 'overall' and 'per_core' CPU usage.
+        snapshot (Snapshot): CPU temperature (float or "N/A"), memory usage and CPU load.
         
     Returns:
         str: JSON formatted string for Waybar.
     """
-    import datetime
+    cpu_temp, mem_info, cpu_load = snapshot
     
     # Format the main text display
     if isinstance(cpu_temp, (int, float)):
-        if cpu_load['overall'] is not None:
-            cpu_text = f"{cpu_temp}°C ({cpu_load['overall']}%)"
+        if cpu_load.overall is not None:
+            cpu_text = f"{cpu_temp:.1f}°C ({cpu_load.overall:.1f}%)"
         else:
-            cpu_text = f"{cpu_temp}°C"
+            cpu_text = f"{cpu_temp:.1f}°C"
     else:
         cpu_text = "N/A"
         
-    if isinstance(mem_info['used_gb'], (int, float)) and isinstance(mem_info['total_gb'], (int, float)) and isinstance(mem_info['percent'], (int, float)):
-        # Round to whole numbers for cleaner display in main bar
-        used_gb_rounded = round(mem_info['used_gb'])
-        total_gb_rounded = round(mem_info['total_gb'])
-        mem_text = f"{used_gb_rounded}GB/{total_gb_rounded}GB ({mem_info['percent']}%)"
+    if mem_info.used_gb is not None:
+        # Whole numbers for cleaner display in main bar
+        mem_text = f"{mem_info.used_gb:.0f}GB/{mem_info.total_gb:.0f}GB ({mem_info.percent:.1f}%)"
     else:
         mem_text = "N/A"
         
     text = f"CPU: {cpu_text} | MEM: {mem_text}"
     
     # Format the tooltip with more detailed information
-    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-    tooltip = f"Hardware Info\n"
-    tooltip += f"CPU Temp: {cpu_text}\n"
+    timestamp = time.strftime("%H:%M:%S")
+    parts = ["Hardware Info\n", f"CPU Temp: {cpu_text}\n"]
     
     # Add CPU load per core
-    if cpu_load['per_core']:
-        tooltip += f"CPU Load:\n"
-        for i, load in enumerate(cpu_load['per_core']):
-            tooltip += f"  Core {i}: {load}%\n"
-    
-    if isinstance(mem_info['used_gb'], (int, float)) and isinstance(mem_info['total_gb'], (int, float)):
-        used_mb = mem_info['used_gb'] * 1024
-        total_mb = mem_info['total_gb'] * 1024
-        tooltip += f"Memory: {used_mb:.2f}MB / {total_mb:.2f}MB ({mem_info['percent']}%)\n"
+    if cpu_load.per_core:
+        parts.append("CPU Load:\n")
+        parts.extend(f"  Core {i}: {load:.1f}%\n" for i, load in enumerate(cpu_load.per_core))
+    
+    if mem_info.used_gb is not None:
+        used_mb = mem_info.used_gb * 1024
+        total_mb = mem_info.total_gb * 1024
+        parts.append(f"Memory: {used_mb:.2f}MB / {total_mb:.2f}MB ({mem_info.percent:.1f}%)\n")
     else:
-        tooltip += f"Memory: N/A\n"
+        parts.append("Memory: N/A\n")
     
-    tooltip += f"Updated: {timestamp}"
+    parts.append(f"Updated: {timestamp}")
+    tooltip = "".join(parts)
     
-    output = {
-        "text": text,
-        "tooltip": tooltip,
-        "class": "hwinfo",
-        "alt": "hwinfo"
-    }
-    return json.dumps(output, indent=None)
+    return to_waybar_json(text, tooltip, "hwinfo")
+
+def write_output(output_json):
+    """
+    Write one line of output for Waybar and flush it.
+    
+    Writes UTF-8 bytes straight to the binary stdout buffer, skipping the text
+    layer's encoding pipeline. Lone surrogates (e.g. from undecodable bytes in an
+    exception message) become \\udcXX escapes, which are still valid JSON.
+    
+    Args:
+        output_json (str): JSON formatted string for Waybar.
+    """
+    sys.stdout.buffer.write(output_json.encode('utf-8', 'backslashreplace') + b'\n')
+    sys.stdout.buffer.flush()
+
+def read_cached_output(interval):
+    """
+    Get the previous run's output if it is recent enough to reuse.
+    
+    Args:
+        interval (int): Update interval in seconds.
+        
+    Returns:
+        str or None: Cached JSON output if it is younger than half the interval, else None.
+    """
+    try:
+        age = time.time() - os.stat(OUTPUT_CACHE_PATH).st_mtime
+        if not (0 <= age < interval * 0.5):
+            return None
+        
+        with open(OUTPUT_CACHE_PATH, 'r', encoding='utf-8') as f:
+            return f.read() or None
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read cached output from {OUTPUT_CACHE_PATH}: {e}")
+        return None
+
+def save_cached_output(output_json):
+    """
+    Atomically persist the output for read_cached_output().
+    
+    Args:
+        output_json (str): JSON formatted string for Waybar.
+    """
+    tmp_path = f"{OUTPUT_CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(RUNTIME_DIR, mode=0o700, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(output_json)
+        os.replace(tmp_path, OUTPUT_CACHE_PATH)
+    except Exception as e:
+        # The output has already been written, so a failed save must never escape
+        logger.warning(f"Could not save output to {OUTPUT_CACHE_PATH}: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
 
 def main():
     """Main execution - runs once and exits for Waybar to restart."""
     args = parse_arguments()
     
+    # Replay the last output when restarted in quick succession (e.g. refresh storms);
+    # only with an explicit --interval, since the gate must match Waybar's interval
+    if args.interval is not None:
+        cached_output = read_cached_output(args.interval)
+        if cached_output is not None:
+            write_output(cached_output)
+            return
+    
+    use_psutil = args.use_psutil and import_psutil()
+    
     try:
-        cpu_temp = get_cpu_temperature()
-        mem_info = get_memory_usage()
-        cpu_load = get_cpu_load()
-        output_json = format_waybar_output(cpu_temp, mem_info, cpu_load)
-        print(output_json, flush=True)
+        output_json = format_waybar_output(collect_snapshot(use_psutil))
+        write_output(output_json)
     except Exception as e:
         logger.error(f"Error in main execution: {e}")
         # Print a minimal error JSON to prevent Waybar from crashing
-        error_output = {
-            "text": "CPU: N/A | MEM: N/A",
-            "tooltip": f"Error: {e}",
-            "class": "hwinfo-error",
-            "alt": "hwinfo-error"
-        }
-        print(json.dumps(error_output, indent=None), flush=True)
+        error_output = to_waybar_json("CPU: N/A | MEM: N/A", f"Error: {e}", "hwinfo-error")
+        write_output(error_output)
         sys.exit(1)
+    
+    # Outside the try above: a failed save must not add a second output line
+    if args.interval is not None:
+        save_cached_output(output_json)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file